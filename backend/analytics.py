@@ -0,0 +1,368 @@
+import numpy as np
+from collections import OrderedDict
+from datetime import date
+from typing import Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from database import transaction_collection, user_collection
+from models.transaction import MINOR_UNITS
+
+# Only the fields the analytics engine needs are pulled from Mongo
+TRANSACTION_PROJECTION = {"a": 1, "d": 1, "c": 1, "t": 1, "p": 1}
+
+# Number of users whose arrays are kept in memory per process
+MAX_CACHED_USERS = 32
+
+ANOMALY_Z_THRESHOLD = 3.0
+MAX_ANOMALIES = 10
+
+
+class TransactionFrame:
+    """Columnar view of a single user's transactions.
+
+    Categorical columns are stored as integer codes into their label lists so
+    group-bys reduce to ``np.bincount`` calls. Ids are kept as raw 12-byte
+    ObjectIds rather than Python objects. ``version`` is the user's
+    transaction version (``users.txnVersion``) the frame reflects.
+    """
+
+    __slots__ = (
+        "version", "ids", "amount", "day", "month",
+        "category", "category_labels",
+        "type", "type_labels",
+        "payment", "payment_labels",
+    )
+
+    def __init__(self, version, ids, amount, day, month, category, category_labels, type_, type_labels, payment, payment_labels):
+        self.version = version
+        self.ids = ids
+        self.amount = amount
+        self.day = day
+        self.month = month
+        self.category = category
+        self.category_labels = category_labels
+        self.type = type_
+        self.type_labels = type_labels
+        self.payment = payment
+        self.payment_labels = payment_labels
+
+    def __len__(self):
+        return len(self.amount)
+
+    def type_mask(self, name: str) -> np.ndarray:
+        if name not in self.type_labels:
+            return np.zeros(len(self), dtype=bool)
+        return self.type == self.type_labels.index(name)
+
+    def append(self, other: "TransactionFrame", version: int) -> "TransactionFrame":
+        category, category_labels = _merge_codes(self.category, self.category_labels, other.category, other.category_labels)
+        type_, type_labels = _merge_codes(self.type, self.type_labels, other.type, other.type_labels)
+        payment, payment_labels = _merge_codes(self.payment, self.payment_labels, other.payment, other.payment_labels)
+        return TransactionFrame(
+            version,
+            np.concatenate((self.ids, other.ids)),
+            np.concatenate((self.amount, other.amount)),
+            np.concatenate((self.day, other.day)),
+            np.concatenate((self.month, other.month)),
+            category, category_labels,
+            type_, type_labels,
+            payment, payment_labels,
+        )
+
+
+def _encode(values):
+    lookup = {}
+    codes = np.fromiter((lookup.setdefault(v, len(lookup)) for v in values), dtype=np.int32, count=len(values))
+    return codes, list(lookup)
+
+
+def _merge_codes(codes, labels, new_codes, new_labels):
+    lookup = {label: i for i, label in enumerate(labels)}
+    merged = list(labels)
+    remap = np.empty(len(new_labels), dtype=np.int32)
+    for i, label in enumerate(new_labels):
+        if label not in lookup:
+            lookup[label] = len(merged)
+            merged.append(label)
+        remap[i] = lookup[label]
+    return np.concatenate((codes, remap[new_codes])), merged
+
+
+# date(1970, 1, 1).toordinal()
+EPOCH_ORDINAL = 719163
+
+
+def _parse_days(dates) -> np.ndarray:
+    # Stored dates are BSON datetimes; toordinal() is far cheaper than numpy's
+    # datetime64 conversion of Python objects
+    return np.fromiter((d.toordinal() for d in dates), dtype=np.int64, count=len(dates)) - EPOCH_ORDINAL
+
+
+def _month_key(day: np.ndarray) -> np.ndarray:
+    return day.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+def build_frame(transactions, version: int = 0) -> TransactionFrame:
+    transactions = list(transactions)
+    ids = np.fromiter((txn["_id"].binary for txn in transactions), dtype="S12", count=len(transactions))
+    amount = np.fromiter((txn["a"] for txn in transactions), dtype=np.int64, count=len(transactions))
+    day = _parse_days([txn["d"] for txn in transactions])
+
+    category, category_labels = _encode([txn["c"] for txn in transactions])
+    type_, type_labels = _encode([txn["t"] for txn in transactions])
+    payment, payment_labels = _encode([txn.get("p") or "UPI" for txn in transactions])
+
+    return TransactionFrame(
+        version, ids, amount, day.astype(np.int32), _month_key(day).astype(np.int32),
+        category, category_labels,
+        type_, type_labels,
+        payment, payment_labels,
+    )
+
+
+# Per-user frame cache. Every transaction write bumps users.txnVersion, so a
+# process that didn't see the write still notices its frame is stale: the
+# version comes for free with the user document loaded for authentication.
+_frame_cache: "OrderedDict[str, TransactionFrame]" = OrderedDict()
+
+
+def _cache_put(user_id: str, frame: TransactionFrame):
+    _frame_cache[user_id] = frame
+    _frame_cache.move_to_end(user_id)
+    if len(_frame_cache) > MAX_CACHED_USERS:
+        _frame_cache.popitem(last=False)
+
+
+async def _bump_version(user_id: str) -> int:
+    user = await user_collection.find_one_and_update(
+        {"_id": ObjectId(user_id)},
+        {"$inc": {"txnVersion": 1}},
+        projection={"txnVersion": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    return user["txnVersion"] if user else 0
+
+
+def cached_frame(user_id: str) -> Optional[TransactionFrame]:
+    return _frame_cache.get(user_id)
+
+
+async def invalidate_user(user_id: str):
+    _frame_cache.pop(user_id, None)
+    await _bump_version(user_id)
+
+
+async def record_insert(user_id: str, transactions: list, cached: Optional[TransactionFrame]):
+    """Append freshly inserted transactions to the cached frame.
+
+    ``cached`` must be the frame peeked before the insert; if it was replaced
+    or another write happened in between, the frame is dropped instead.
+    """
+    version = await _bump_version(user_id)
+    frame = _frame_cache.get(user_id)
+    if frame is None:
+        return
+    if frame is cached and frame.version == version - 1:
+        _cache_put(user_id, frame.append(build_frame(transactions), version))
+    else:
+        _frame_cache.pop(user_id, None)
+
+
+async def get_user_frame(user_id: str, version: int) -> TransactionFrame:
+    frame = _frame_cache.get(user_id)
+    if frame is not None and frame.version == version:
+        _frame_cache.move_to_end(user_id)
+        return frame
+
+    cursor = transaction_collection.find({"u": user_id}, TRANSACTION_PROJECTION)
+    frame = build_frame(await cursor.to_list(length=None), version)
+    # A write racing with the load leaves a frame newer than ``version``;
+    # the next request carries the bumped version and rebuilds it
+    _cache_put(user_id, frame)
+    return frame
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    if len(values) == 0:
+        return values
+    csum = np.cumsum(np.concatenate(([0.0], values)))
+    out = np.empty(len(values))
+    idx = np.arange(1, len(values) + 1)
+    start = np.maximum(idx - window, 0)
+    # Leading partial windows average over the days actually present
+    out[:] = (csum[idx] - csum[start]) / (idx - start)
+    return out
+
+
+def _rupees(paise) -> float:
+    # Sums come back from bincount as float64 holding whole paise
+    return int(round(float(paise))) / MINOR_UNITS
+
+
+def _month_label(month: int) -> str:
+    return str(np.datetime64(int(month), "M"))
+
+
+def compute_insights(frame: TransactionFrame, today: Optional[date] = None) -> dict:
+    today_day = int(np.datetime64(today or date.today(), "D").astype(np.int64))
+
+    expense_mask = frame.type_mask("expense")
+    income_mask = frame.type_mask("income")
+    amount = frame.amount
+    expense_amount = amount[expense_mask]
+    income_amount = amount[income_mask]
+    expense_day = frame.day[expense_mask]
+    expense_category = frame.category[expense_mask]
+
+    # Aggregation stays in integer paise; convert to rupees only for output.
+    # bincount weights are float64 anyway, and whole paise are exact in it.
+    total_expense = int(expense_amount.sum())
+    total_income = int(income_amount.sum())
+    expense_float = expense_amount.astype(np.float64)
+
+    result = {
+        "totals": {
+            "income": _rupees(total_income),
+            "expense": _rupees(total_expense),
+            "net": _rupees(total_income - total_expense),
+            "count": len(frame),
+        },
+        "byCategory": [],
+        "byPaymentMode": [],
+        "monthly": [],
+        "monthOverMonth": None,
+        "rolling": None,
+        "anomalies": [],
+        "patterns": [],
+        "insights": [],
+    }
+    if len(frame) == 0:
+        return result
+
+    # Category / payment mode group-bys (expenses only)
+    n_categories = len(frame.category_labels)
+    cat_total = np.bincount(expense_category, weights=expense_float, minlength=n_categories)
+    cat_count = np.bincount(expense_category, minlength=n_categories)
+    order = np.argsort(-cat_total)
+    result["byCategory"] = [
+        {
+            "categoryId": frame.category_labels[i],
+            "total": _rupees(cat_total[i]),
+            "count": int(cat_count[i]),
+            "percentage": round(float(cat_total[i] / total_expense * 100), 1) if total_expense else 0.0,
+        }
+        for i in order if cat_count[i] > 0
+    ]
+
+    pay_total = np.bincount(frame.payment[expense_mask], weights=expense_float, minlength=len(frame.payment_labels))
+    result["byPaymentMode"] = [
+        {"paymentMode": label, "total": _rupees(pay_total[i])}
+        for i, label in enumerate(frame.payment_labels) if pay_total[i] > 0
+    ]
+
+    # Monthly totals and month-over-month change
+    first_month = int(frame.month.min())
+    n_months = int(frame.month.max()) - first_month + 1
+    monthly_expense = np.bincount(frame.month[expense_mask] - first_month, weights=expense_float, minlength=n_months)
+    monthly_income = np.bincount(frame.month[income_mask] - first_month, weights=income_amount.astype(np.float64), minlength=n_months)
+    result["monthly"] = [
+        {"month": _month_label(first_month + i), "income": _rupees(monthly_income[i]), "expense": _rupees(monthly_expense[i])}
+        for i in range(n_months)
+    ]
+    current_month = int(_month_key(np.array([today_day]))[0]) - first_month
+    if 1 <= current_month < n_months:
+        previous = _rupees(monthly_expense[current_month - 1])
+        current = _rupees(monthly_expense[current_month])
+        result["monthOverMonth"] = {
+            "month": _month_label(first_month + current_month),
+            "current": current,
+            "previous": previous,
+            "change": round((current - previous) / previous * 100, 1) if previous else None,
+        }
+
+    if len(expense_amount) == 0:
+        return result
+
+    # Daily expense series up to today (quiet days count as zero) and rolling averages
+    first_day = int(expense_day.min())
+    n_days = max(int(expense_day.max()), today_day) - first_day + 1
+    daily = np.bincount(expense_day - first_day, weights=expense_float, minlength=n_days)
+    rolling_7 = _rolling_mean(daily, 7)
+    rolling_30 = _rolling_mean(daily, 30)
+    result["rolling"] = {
+        "startDate": str(np.datetime64(first_day + max(n_days - 90, 0), "D")),
+        "rolling7": np.round(rolling_7[-90:] / MINOR_UNITS, 2).tolist(),
+        "rolling30": np.round(rolling_30[-90:] / MINOR_UNITS, 2).tolist(),
+    }
+
+    # Z-score anomalies against each category's own distribution. Rows are
+    # compared with a per-category amount threshold, so z is only computed
+    # for the few rows that cross it
+    cat_sum_sq = np.bincount(expense_category, weights=expense_float ** 2, minlength=n_categories)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cat_mean = np.where(cat_count > 0, cat_total / cat_count, 0.0)
+        cat_std = np.sqrt(np.maximum(np.where(cat_count > 0, cat_sum_sq / cat_count, 0.0) - cat_mean ** 2, 0.0))
+    # A category with no spread can't have outliers
+    threshold = np.where(cat_std > 0, cat_mean + ANOMALY_Z_THRESHOLD * cat_std, np.inf)
+    flagged = np.flatnonzero(expense_float > threshold[expense_category])
+    anomaly_count = len(flagged)
+    flagged_category = expense_category[flagged]
+    z = (expense_float[flagged] - cat_mean[flagged_category]) / cat_std[flagged_category]
+    strongest = np.argsort(-z)[:MAX_ANOMALIES]
+    flagged, z = flagged[strongest], z[strongest]
+    expense_rows = np.flatnonzero(expense_mask)
+    result["anomalies"] = [
+        {
+            # Slice + tobytes keeps trailing zero bytes that np.bytes_ would strip
+            "id": str(ObjectId(frame.ids[expense_rows[i]:expense_rows[i] + 1].tobytes())),
+            "categoryId": frame.category_labels[expense_category[i]],
+            "amount": _rupees(expense_amount[i]),
+            "date": str(np.datetime64(int(expense_day[i]), "D")),
+            "zScore": round(float(score), 2),
+        }
+        for i, score in zip(flagged, z)
+    ]
+
+    # Patterns / insights in the same shape as the frontend insights service
+    top = result["byCategory"][0]
+    result["patterns"].append({
+        "type": "top_category",
+        "categoryId": top["categoryId"],
+        "amount": top["total"],
+        "percentage": f"{top['percentage']:.1f}",
+    })
+    result["insights"].append({
+        "type": "info",
+        "title": "Top Spending Category",
+        "message": f"{top['categoryId']} accounts for {top['percentage']:.1f}% of total expenses",
+        "icon": "📊",
+    })
+
+    if anomaly_count > 0:
+        result["insights"].append({
+            "type": "warning",
+            "title": "High Spending Alert",
+            "message": f"You have {anomaly_count} transaction(s) significantly above your usual spending",
+            "icon": "⚠️",
+        })
+
+    last_30 = expense_day >= today_day - 30
+    if last_30.any():
+        result["patterns"].append({
+            "type": "daily_average",
+            "amount": round(float(expense_amount[last_30].sum()) / 30 / MINOR_UNITS, 2),
+            "period": "last 30 days",
+        })
+
+    mom = result["monthOverMonth"]
+    if mom and mom["change"] is not None and mom["change"] > 20:
+        result["insights"].append({
+            "type": "warning",
+            "title": "Spending Up This Month",
+            "message": f"Your spending is up {mom['change']:.1f}% compared to last month",
+            "icon": "📈",
+        })
+
+    return result
@@ -0,0 +1,97 @@
+"""Compare the legacy and compact transaction storage schemas.
+
+Generates synthetic transactions, writes them in both layouts to a scratch
+database, and reports document size, index size and date-range scan time.
+The scratch collections are dropped afterwards. Point --uri at a disposable
+server; it defaults to a local MongoDB.
+
+    python bench_transactions.py [--count 200000] [--users 20] [--uri mongodb://localhost:27017]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from bson import encode
+from pymongo import MongoClient, ASCENDING, DESCENDING
+
+from models.transaction import CreateTransactionSchema, to_storage, format_date
+
+CATEGORIES = ["food", "transport", "shopping", "entertainment", "bills", "health", "education", "other"]
+PAYMENT_MODES = ["UPI", "Card", "Cash", "NetBanking"]
+
+def generate_legacy(count: int, users: int) -> list:
+    start = datetime(2020, 1, 1)
+    transactions = []
+    for _ in range(count):
+        transaction = {
+            "user_id": f"user{random.randrange(users):04d}",
+            "amount": round(random.uniform(10, 5000), 2),
+            "description": random.choice([None, "Groceries", "Fuel", "Dinner"]),
+            "categoryId": random.choice(CATEGORIES),
+            "date": format_date(start + timedelta(days=random.randrange(5 * 365))),
+            "type": "income" if random.random() < 0.1 else "expense",
+            "paymentMode": random.choice(PAYMENT_MODES)
+        }
+        # The compact layout drops nulls; do the same here so sizes compare like for like
+        transactions.append({k: v for k, v in transaction.items() if v is not None})
+    return transactions
+
+def to_compact(document: dict) -> dict:
+    return to_storage(CreateTransactionSchema(**document), document["user_id"])
+
+def time_range_scans(collection, user_field: str, date_field: str, ranges: list) -> float:
+    started = time.perf_counter()
+    for user_id, start, end in ranges:
+        list(collection.find({user_field: user_id, date_field: {"$gte": start, "$lt": end}}))
+    return (time.perf_counter() - started) / len(ranges) * 1000
+
+def main(count: int, users: int, uri: str):
+    random.seed(0)
+    legacy = generate_legacy(count, users)
+    compact = [to_compact(document) for document in legacy]
+
+    legacy_bson = sum(len(encode(document)) for document in legacy) / count
+    compact_bson = sum(len(encode(document)) for document in compact) / count
+    print(f"Average BSON size: legacy {legacy_bson:.1f} B, compact {compact_bson:.1f} B")
+
+    client = MongoClient(uri)
+    database = client.track_me_bench
+    legacy_collection = database.transactions_legacy
+    compact_collection = database.transactions_compact
+    try:
+        legacy_collection.drop()
+        compact_collection.drop()
+        legacy_collection.insert_many(legacy)
+        compact_collection.insert_many(compact)
+        legacy_collection.create_index([("user_id", ASCENDING), ("date", DESCENDING)])
+        compact_collection.create_index([("u", ASCENDING), ("d", DESCENDING)])
+
+        for name, collection in (("legacy", legacy_collection), ("compact", compact_collection)):
+            stats = database.command("collStats", collection.name)
+            print(f"{name:>8}: avgObjSize {stats['avgObjSize']} B, "
+                  f"storageSize {stats['storageSize'] / 1024:.0f} KiB, "
+                  f"totalIndexSize {stats['totalIndexSize'] / 1024:.0f} KiB")
+
+        # 90-day windows for random users
+        ranges = []
+        for _ in range(200):
+            start = datetime(2020, 1, 1) + timedelta(days=random.randrange(5 * 365 - 90))
+            ranges.append((f"user{random.randrange(users):04d}", start, start + timedelta(days=90)))
+
+        legacy_ms = time_range_scans(legacy_collection, "user_id", "date",
+                                     [(u, format_date(s), format_date(e)) for u, s, e in ranges])
+        compact_ms = time_range_scans(compact_collection, "u", "d", ranges)
+        print(f"90-day range scan: legacy {legacy_ms:.2f} ms, compact {compact_ms:.2f} ms")
+    finally:
+        legacy_collection.drop()
+        compact_collection.drop()
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    args = parser.parse_args()
+    main(args.count, args.users, args.uri)
@@ -13,6 +13,8 @@ database = client.track_me
 
 user_collection = database.get_collection("users")
 transaction_collection = database.get_collection("transactions")
+transaction_archive_collection = database.get_collection("transactions_archive")
+transaction_quarantine_collection = database.get_collection("transactions_quarantine")
 goal_collection = database.get_collection("goals")
 budget_collection = database.get_collection("budgets")
 recurring_collection = database.get_collection("recurring")
@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import auth, transactions, goals, budgets, recurring, categories
+from routers import auth, transactions, goals, budgets, recurring, categories, insights
 
 
 
@@ -26,6 +26,7 @@ app.include_router(goals.router, tags=["Goals"], prefix="/goals")
 app.include_router(budgets.router, tags=["Budgets"], prefix="/budgets")
 app.include_router(recurring.router, tags=["Recurring"], prefix="/recurring")
 app.include_router(categories.router, tags=["Categories"], prefix="/categories")
+app.include_router(insights.router, tags=["Insights"], prefix="/insights")
 
 
 
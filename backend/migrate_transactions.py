@@ -0,0 +1,154 @@
+"""Migrate transactions to the compact storage schema.
+
+Rewrites legacy documents (long field names, string dates, float amounts)
+into the StoredTransactionSchema layout, converts archived batches, and
+builds the (u, d) index the API queries on.
+
+The migration is batched and resumable: only documents still in the legacy
+shape are selected, so an interrupted run can simply be started again.
+Rows that can't be converted are moved to the transactions_quarantine
+collection, where their owners can fix and restore them through
+/transactions/quarantine.
+
+    python migrate_transactions.py [--batch-size 1000]
+"""
+import argparse
+import asyncio
+import zlib
+from datetime import datetime
+
+from bson import Binary, encode, decode
+from pymongo import ReplaceOne, ASCENDING, DESCENDING
+
+from database import transaction_collection, transaction_archive_collection, transaction_quarantine_collection
+from models.transaction import CreateTransactionSchema, to_storage
+
+LEGACY_FILTER = {"amount": {"$exists": True}}
+
+# Anything a malformed legacy row can raise while being converted
+CONVERSION_ERRORS = (ValueError, TypeError, KeyError, OverflowError)
+
+def legacy_to_storage(document: dict) -> dict:
+    legacy = dict(document)
+    # Legacy dates were free-form strings; keep the calendar day
+    if isinstance(legacy.get("date"), str):
+        legacy["date"] = legacy["date"][:10]
+    transaction = CreateTransactionSchema(**legacy)
+    stored = to_storage(transaction, document["user_id"])
+    stored["_id"] = document["_id"]
+    # Fail here rather than in the bulk write if BSON can't hold a value
+    encode(stored)
+    return stored
+
+async def quarantine(document: dict, error: Exception, source: str):
+    await transaction_quarantine_collection.replace_one(
+        {"_id": document["_id"]},
+        {
+            "user_id": document.get("user_id"),
+            "source": source,
+            "error": f"{type(error).__name__}: {error}",
+            "quarantinedAt": datetime.utcnow(),
+            "document": document
+        },
+        upsert=True
+    )
+
+async def migrate_transactions(batch_size: int):
+    migrated = 0
+    quarantined = 0
+    last_id = None
+    while True:
+        query = dict(LEGACY_FILTER)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await transaction_collection.find(query).sort("_id", ASCENDING).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        operations = []
+        for document in batch:
+            try:
+                stored = legacy_to_storage(document)
+            except CONVERSION_ERRORS as e:
+                print(f"Quarantining transaction {document['_id']}: {e}")
+                # Copy first, then remove, so a crash in between only leaves a duplicate
+                await quarantine(document, e, "transactions")
+                await transaction_collection.delete_one({"_id": document["_id"], **LEGACY_FILTER})
+                quarantined += 1
+                continue
+            # The legacy filter makes the replace a no-op if another run got there first
+            operations.append(ReplaceOne({"_id": document["_id"], **LEGACY_FILTER}, stored))
+
+        if operations:
+            result = await transaction_collection.bulk_write(operations, ordered=False)
+            migrated += result.modified_count
+        print(f"Migrated {migrated} transactions ({quarantined} quarantined)")
+
+    return migrated, quarantined
+
+async def migrate_archive():
+    migrated = 0
+    quarantined = 0
+    skipped = 0
+    async for batch in transaction_archive_collection.find({"version": {"$exists": False}}):
+        try:
+            documents = decode(zlib.decompress(batch["data"]))["transactions"]
+        except Exception as e:
+            # Left unmigrated; the batch can't be read so there is nothing to salvage here
+            print(f"Skipping unreadable archive batch {batch['_id']}: {e}")
+            skipped += 1
+            continue
+
+        stored = []
+        for document in documents:
+            try:
+                stored.append(legacy_to_storage(document))
+            except CONVERSION_ERRORS as e:
+                print(f"Quarantining archived transaction {document.get('_id')} from batch {batch['_id']}: {e}")
+                await quarantine(document, e, "archive")
+                quarantined += 1
+
+        if not stored:
+            await transaction_archive_collection.delete_one({"_id": batch["_id"], "version": {"$exists": False}})
+            continue
+
+        dates = [document["d"] for document in stored]
+        archived_at = batch.get("archivedAt")
+        if isinstance(archived_at, str):
+            archived_at = datetime.fromisoformat(archived_at)
+        await transaction_archive_collection.update_one(
+            {"_id": batch["_id"], "version": {"$exists": False}},
+            {"$set": {
+                "count": len(stored),
+                "fromDate": min(dates),
+                "toDate": max(dates),
+                "archivedAt": archived_at,
+                "version": 2,
+                "ids": [document["_id"] for document in stored],
+                "data": Binary(zlib.compress(encode({"transactions": stored})))
+            }}
+        )
+        migrated += 1
+    print(f"Migrated {migrated} archive batches ({quarantined} transactions quarantined, {skipped} batches unreadable)")
+    return migrated, quarantined, skipped
+
+async def create_indexes():
+    await transaction_collection.create_index([("u", ASCENDING), ("d", DESCENDING)])
+    await transaction_archive_collection.create_index([("user_id", ASCENDING)])
+    await transaction_quarantine_collection.create_index([("user_id", ASCENDING)])
+
+async def main(batch_size: int):
+    _, quarantined = await migrate_transactions(batch_size)
+    _, archive_quarantined, _ = await migrate_archive()
+    await create_indexes()
+    if quarantined or archive_quarantined:
+        print(f"{quarantined + archive_quarantined} transactions are in transactions_quarantine; "
+              "owners can review them at GET /transactions/quarantine and restore them with "
+              "POST /transactions/quarantine/{id}/restore")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
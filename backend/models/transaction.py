@@ -1,6 +1,33 @@
-from pydantic import BaseModel, Field
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from bson import ObjectId
+from datetime import date, datetime, time
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional, List
+
+# Amounts are stored as integer paise (minor units)
+MINOR_UNITS = 100
+
+# Upper bound for a single amount; keeps paise well inside BSON's int64
+MAX_AMOUNT = 1_000_000_000_000
+
+DEFAULT_PAYMENT_MODE = "UPI"
+
+def to_minor_units(amount: float) -> int:
+    return int((Decimal(str(amount)) * MINOR_UNITS).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+def from_minor_units(amount: int) -> float:
+    return amount / MINOR_UNITS
+
+def parse_date(value: str) -> datetime:
+    # Transactions carry a calendar day ("YYYY-MM-DD"), stored as midnight
+    return datetime.combine(date.fromisoformat(value), time())
+
+def end_of_day(value: str) -> datetime:
+    # Inclusive upper bound that can't overflow, unlike adding a day to date.max
+    return datetime.combine(date.fromisoformat(value), time(23, 59, 59, 999000))
+
+def format_date(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d")
 
 class TransactionSchema(BaseModel):
     user_id: str = Field(...)
@@ -25,9 +52,90 @@ class TransactionSchema(BaseModel):
         }
 
 class CreateTransactionSchema(BaseModel):
-    amount: float = Field(...)
+    amount: float = Field(..., gt=0, le=MAX_AMOUNT, allow_inf_nan=False)
     description: Optional[str] = None
     categoryId: str = Field(...)
     date: str = Field(...)
     type: str = Field(...)
     paymentMode: Optional[str] = "UPI"
+
+    @field_validator("amount")
+    @classmethod
+    def check_amount(cls, value):
+        # Stored as whole paise, so anything that rounds to zero is not positive
+        if to_minor_units(value) < 1:
+            raise ValueError("Amount must be at least 0.01")
+        return value
+
+    @field_validator("date")
+    @classmethod
+    def check_date(cls, value):
+        parse_date(value)
+        return value
+
+class StoredTransactionSchema(BaseModel):
+    # Shape of a document in the transactions collection. Field names are
+    # shortened on disk; the API keeps using the long names.
+    user_id: str = Field(..., alias="u")
+    amount: int = Field(..., alias="a") # paise
+    description: Optional[str] = Field(default=None, alias="n")
+    categoryId: str = Field(..., alias="c")
+    date: datetime = Field(..., alias="d")
+    type: str = Field(..., alias="t")
+    paymentMode: Optional[str] = Field(default="UPI", alias="p")
+
+    class Config:
+        populate_by_name = True
+
+def to_storage(transaction: CreateTransactionSchema, user_id: str) -> dict:
+    stored = StoredTransactionSchema(
+        user_id=user_id,
+        amount=to_minor_units(transaction.amount),
+        description=transaction.description,
+        categoryId=transaction.categoryId,
+        date=parse_date(transaction.date),
+        type=transaction.type,
+        # Stored explicitly so filters on the default match what reads report
+        paymentMode=transaction.paymentMode or DEFAULT_PAYMENT_MODE
+    )
+    return stored.dict(by_alias=True, exclude_none=True)
+
+def from_storage(document: dict) -> dict:
+    stored = StoredTransactionSchema(**document)
+    return {
+        "id": str(document["_id"]),
+        "amount": from_minor_units(stored.amount),
+        "description": stored.description,
+        "categoryId": stored.categoryId,
+        "date": format_date(stored.date),
+        "type": stored.type,
+        "paymentMode": stored.paymentMode,
+        "user_id": stored.user_id
+    }
+
+class BulkDeleteTransactionSchema(BaseModel):
+    ids: Optional[List[str]] = None
+    categoryId: Optional[str] = None
+    type: Optional[str] = None
+    paymentMode: Optional[str] = None
+    startDate: Optional[str] = None
+    endDate: Optional[str] = None
+
+    @field_validator("ids")
+    @classmethod
+    def check_ids(cls, value):
+        for id in value or []:
+            if not ObjectId.is_valid(id):
+                raise ValueError(f"Invalid transaction id: {id}")
+        return value
+
+    @field_validator("startDate", "endDate")
+    @classmethod
+    def check_date(cls, value):
+        if value is not None:
+            parse_date(value)
+        return value
+
+class ArchiveTransactionSchema(BaseModel):
+    olderThanYears: int = Field(default=2, ge=1, le=100)
+    batchSize: int = Field(default=1000, ge=1, le=10000)
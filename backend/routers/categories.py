@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Body, HTTPException, Depends
-from database import category_collection
+from database import category_collection, transaction_collection, budget_collection, recurring_collection
 from models.categories import CategorySchema, CreateCategorySchema
 from routers.auth import get_current_user
+from analytics import invalidate_user
 from typing import List
 from bson import ObjectId
 
@@ -72,5 +73,20 @@ async def delete_category(id: str, current_user: dict = Depends(get_current_user
         # We can't delete default categories
          raise HTTPException(status_code=400, detail="Cannot delete default category or category not found")
     
+    user_id = str(current_user["_id"])
+    # Move anything still pointing at this category to the default "Other" bucket
+    # of the same type, and drop budgets that only applied to it
+    fallback = "other_income" if cat["type"] == "income" else "other"
+    reference = {"user_id": user_id, "categoryId": id}
+    txn_result = await transaction_collection.update_many({"u": user_id, "c": id}, {"$set": {"c": fallback}})
+    await recurring_collection.update_many(reference, {"$set": {"categoryId": fallback}})
+    budget_result = await budget_collection.delete_many(reference)
+
     await category_collection.delete_one({"_id": ObjectId(id)})
-    return {"message": "Category deleted successfully"}
+    if txn_result.modified_count:
+        await invalidate_user(user_id)
+    return {
+        "message": "Category deleted successfully",
+        "reassignedTransactions": txn_result.modified_count,
+        "deletedBudgets": budget_result.deleted_count
+    }
@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Depends
+from routers.auth import get_current_user
+from analytics import get_user_frame, compute_insights
+
+router = APIRouter()
+
+@router.get("/", response_description="Spending insights computed from the user's transactions")
+async def get_insights(current_user: dict = Depends(get_current_user)):
+    frame = await get_user_frame(str(current_user["_id"]), current_user.get("txnVersion", 0))
+    return compute_insights(frame)
@@ -1,47 +1,53 @@
 from fastapi import APIRouter, Body, HTTPException, Depends, Request
-from database import transaction_collection
-from models.transaction import TransactionSchema, CreateTransactionSchema
+from database import transaction_collection, transaction_archive_collection, transaction_quarantine_collection
+from models.transaction import (
+    TransactionSchema, CreateTransactionSchema, BulkDeleteTransactionSchema, ArchiveTransactionSchema,
+    to_storage, from_storage, parse_date, end_of_day, format_date, DEFAULT_PAYMENT_MODE
+)
 from routers.auth import get_current_user
-from typing import List
-from bson import ObjectId
+from analytics import invalidate_user, record_insert, cached_frame
+from typing import List, Optional
+from bson import ObjectId, Binary, encode, decode
+from datetime import datetime
+import zlib
 
 router = APIRouter()
 
+# Stored documents use the short field names from StoredTransactionSchema
+# (u=user_id, a=amount, n=description, c=categoryId, d=date, t=type, p=paymentMode)
+ARCHIVE_VERSION = 2
+
+# Keeps an archive document and its exact-match delete well under MongoDB's 16 MB limit
+ARCHIVE_BATCH_BYTES = 8 * 1024 * 1024
+
 def transaction_helper(transaction) -> dict:
-    return {
-        "id": str(transaction["_id"]),
-        "amount": transaction["amount"],
-        "description": transaction.get("description"),
-        "categoryId": transaction["categoryId"],
-        "date": transaction["date"],
-        "type": transaction["type"],
-        "paymentMode": transaction.get("paymentMode"),
-        "user_id": transaction["user_id"]
-    }
+    return from_storage(transaction)
 
 @router.get("/", response_description="Retrieve all transactions")
 async def get_transactions(current_user: dict = Depends(get_current_user)):
     transactions = []
-    async for transaction in transaction_collection.find({"user_id": str(current_user["_id"])}):
+    async for transaction in transaction_collection.find({"u": str(current_user["_id"])}):
         transactions.append(transaction_helper(transaction))
     return transactions
 
 @router.post("/", response_description="Add a transaction")
 async def add_transaction(transaction: CreateTransactionSchema = Body(...), current_user: dict = Depends(get_current_user)):
-    transaction_data = transaction.dict()
-    transaction_data["user_id"] = str(current_user["_id"])
+    transaction_data = to_storage(transaction, str(current_user["_id"]))
+    cached = cached_frame(str(current_user["_id"]))
     new_transaction = await transaction_collection.insert_one(transaction_data)
+    await record_insert(str(current_user["_id"]), [transaction_data], cached)
     created_transaction = await transaction_collection.find_one({"_id": new_transaction.inserted_id})
     return transaction_helper(created_transaction)
 
 @router.put("/{id}", response_description="Update a transaction")
 async def update_transaction(id: str, req: CreateTransactionSchema = Body(...), current_user: dict = Depends(get_current_user)):
-    transaction = await transaction_collection.find_one({"_id": ObjectId(id), "user_id": str(current_user["_id"])})
+    transaction = await transaction_collection.find_one({"_id": ObjectId(id), "u": str(current_user["_id"])})
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     
-    updated_data = req.dict()
-    await transaction_collection.update_one({"_id": ObjectId(id)}, {"$set": updated_data})
+    updated_data = to_storage(req, str(current_user["_id"]))
+    await transaction_collection.replace_one({"_id": ObjectId(id)}, updated_data)
+    await invalidate_user(str(current_user["_id"]))
     
     # Return updated transaction
     updated_transaction = await transaction_collection.find_one({"_id": ObjectId(id)})
@@ -49,20 +55,188 @@ async def update_transaction(id: str, req: CreateTransactionSchema = Body(...),
 
 @router.delete("/{id}", response_description="Delete a transaction")
 async def delete_transaction(id: str, current_user: dict = Depends(get_current_user)):
-    transaction = await transaction_collection.find_one({"_id": ObjectId(id), "user_id": str(current_user["_id"])})
+    transaction = await transaction_collection.find_one({"_id": ObjectId(id), "u": str(current_user["_id"])})
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     
     await transaction_collection.delete_one({"_id": ObjectId(id)})
+    await invalidate_user(str(current_user["_id"]))
     return {"message": "Transaction deleted successfully"}
 
 @router.post("/sync", response_description="Sync local transactions")
 async def sync_transactions(transactions: List[CreateTransactionSchema] = Body(...), current_user: dict = Depends(get_current_user)):
     inserted_ids = []
-    for txn in transactions:
-        txn_data = txn.dict()
-        txn_data["user_id"] = str(current_user["_id"])
-        result = await transaction_collection.insert_one(txn_data)
-        inserted_ids.append(str(result.inserted_id))
+    if transactions:
+        documents = [to_storage(txn, str(current_user["_id"])) for txn in transactions]
+        cached = cached_frame(str(current_user["_id"]))
+        result = await transaction_collection.insert_many(documents)
+        inserted_ids = [str(i) for i in result.inserted_ids]
+        await record_insert(str(current_user["_id"]), documents, cached)
     
     return {"message": f"Synced {len(inserted_ids)} transactions", "ids": inserted_ids}
+
+def bulk_filter(user_id: str, criteria: BulkDeleteTransactionSchema) -> dict:
+    query = {"u": user_id}
+    if criteria.ids:
+        query["_id"] = {"$in": [ObjectId(i) for i in criteria.ids]}
+    for field, stored in (("categoryId", "c"), ("type", "t"), ("paymentMode", "p")):
+        value = getattr(criteria, field)
+        if value is not None:
+            query[stored] = value
+    # Rows written before the default was stored explicitly have no "p"
+    if criteria.paymentMode == DEFAULT_PAYMENT_MODE:
+        query["p"] = {"$in": [DEFAULT_PAYMENT_MODE, None]}
+    if criteria.startDate or criteria.endDate:
+        query["d"] = {}
+        if criteria.startDate:
+            query["d"]["$gte"] = parse_date(criteria.startDate)
+        if criteria.endDate:
+            query["d"]["$lte"] = end_of_day(criteria.endDate)
+    return query
+
+@router.post("/bulk-delete", response_description="Delete transactions matching a filter")
+async def bulk_delete_transactions(criteria: BulkDeleteTransactionSchema = Body(...), current_user: dict = Depends(get_current_user)):
+    query = bulk_filter(str(current_user["_id"]), criteria)
+    # Refuse an empty filter so a bad request can't wipe every transaction
+    if len(query) == 1:
+        raise HTTPException(status_code=400, detail="At least one filter is required")
+
+    result = await transaction_collection.delete_many(query)
+    await invalidate_user(str(current_user["_id"]))
+    return {"message": f"Deleted {result.deleted_count} transactions", "deleted": result.deleted_count}
+
+def archive_cutoff(years: int, today: Optional[datetime] = None) -> datetime:
+    today = (today or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:
+        # Feb 29 in a non-leap target year
+        return today.replace(year=today.year - years, day=28)
+
+def cap_batch_bytes(batch: list) -> list:
+    # Long descriptions can make a few thousand rows larger than one BSON document
+    size = 0
+    for i, txn in enumerate(batch):
+        size += len(encode(txn))
+        if size > ARCHIVE_BATCH_BYTES and i > 0:
+            return batch[:i]
+    return batch
+
+def archive_document(user_id: str, batch: list) -> dict:
+    dates = [txn["d"] for txn in batch]
+    return {
+        "user_id": user_id,
+        "count": len(batch),
+        "fromDate": min(dates),
+        "toDate": max(dates),
+        "archivedAt": datetime.utcnow(),
+        "version": ARCHIVE_VERSION,
+        "ids": [txn["_id"] for txn in batch],
+        "data": Binary(zlib.compress(encode({"transactions": batch}))),
+    }
+
+@router.post("/archive", response_description="Move old transactions into the archive collection")
+async def archive_transactions(req: ArchiveTransactionSchema = Body(...), current_user: dict = Depends(get_current_user)):
+    user_id = str(current_user["_id"])
+    cutoff = archive_cutoff(req.olderThanYears)
+    query = {"u": user_id, "d": {"$lt": cutoff}}
+
+    archived = 0
+    batches = 0
+    last_id = None
+    while True:
+        page = query if last_id is None else {**query, "_id": {"$gt": last_id}}
+        batch = await transaction_collection.find(page).sort("_id", 1).limit(req.batchSize).to_list(length=req.batchSize)
+        if not batch:
+            break
+        batch = cap_batch_bytes(batch)
+        last_id = batch[-1]["_id"]
+        ids = [txn["_id"] for txn in batch]
+
+        # Keyed on the first transaction id so a retry after a failed delete
+        # overwrites the same archive document instead of duplicating it; a
+        # different batch already stored under that key gets a fresh id
+        key = batch[0]["_id"]
+        existing = await transaction_archive_collection.find_one({"_id": key}, {"ids": 1})
+        if existing and existing.get("ids") != ids:
+            key = ObjectId()
+        await transaction_archive_collection.replace_one({"_id": key}, archive_document(user_id, batch), upsert=True)
+
+        # Each $or branch is the full document as archived, so a transaction
+        # edited since it was read stays live and is dropped from the archive
+        result = await transaction_collection.delete_many({"$or": batch})
+        if result.deleted_count < len(batch):
+            live = {txn["_id"] async for txn in transaction_collection.find({"_id": {"$in": ids}}, {"_id": 1})}
+            batch = [txn for txn in batch if txn["_id"] not in live]
+            if not batch:
+                await transaction_archive_collection.delete_one({"_id": key})
+                continue
+            await transaction_archive_collection.replace_one({"_id": key}, archive_document(user_id, batch))
+        archived += len(batch)
+        batches += 1
+
+    if archived:
+        await invalidate_user(user_id)
+    return {"message": f"Archived {archived} transactions", "archived": archived, "batches": batches, "cutoff": format_date(cutoff)}
+
+@router.get("/archive", response_description="List archived transaction batches")
+async def get_archive(current_user: dict = Depends(get_current_user)):
+    batches = []
+    async for batch in transaction_archive_collection.find({"user_id": str(current_user["_id"]), "version": ARCHIVE_VERSION}, {"data": 0, "ids": 0}):
+        batches.append({
+            "id": str(batch["_id"]),
+            "count": batch["count"],
+            "fromDate": format_date(batch["fromDate"]),
+            "toDate": format_date(batch["toDate"]),
+            "archivedAt": batch["archivedAt"].isoformat()
+        })
+    return batches
+
+@router.get("/archive/{id}", response_description="Retrieve the transactions in an archived batch")
+async def get_archive_batch(id: str, current_user: dict = Depends(get_current_user)):
+    batch = await transaction_archive_collection.find_one({"_id": ObjectId(id), "user_id": str(current_user["_id"]), "version": ARCHIVE_VERSION})
+    if not batch:
+        raise HTTPException(status_code=404, detail="Archive batch not found")
+
+    transactions = decode(zlib.decompress(batch["data"]))["transactions"]
+    return [transaction_helper(txn) for txn in transactions]
+
+def quarantine_helper(entry) -> dict:
+    return {
+        "id": str(entry["_id"]),
+        "source": entry["source"],
+        "error": entry["error"],
+        "quarantinedAt": entry["quarantinedAt"].isoformat(),
+        # Raw legacy values failed validation and may not be JSON-safe (NaN etc.)
+        "document": {k: str(v) for k, v in entry["document"].items() if k != "_id"}
+    }
+
+@router.get("/quarantine", response_description="List transactions the schema migration could not convert")
+async def get_quarantine(current_user: dict = Depends(get_current_user)):
+    entries = []
+    async for entry in transaction_quarantine_collection.find({"user_id": str(current_user["_id"])}):
+        entries.append(quarantine_helper(entry))
+    return entries
+
+@router.post("/quarantine/{id}/restore", response_description="Restore a quarantined transaction with corrected values")
+async def restore_quarantined(id: str, req: CreateTransactionSchema = Body(...), current_user: dict = Depends(get_current_user)):
+    entry = await transaction_quarantine_collection.find_one({"_id": ObjectId(id), "user_id": str(current_user["_id"])})
+    if not entry:
+        raise HTTPException(status_code=404, detail="Quarantined transaction not found")
+
+    # Keeps the original id; the upsert makes a retried restore harmless
+    transaction_data = to_storage(req, str(current_user["_id"]))
+    transaction_data["_id"] = entry["_id"]
+    await transaction_collection.replace_one({"_id": entry["_id"]}, transaction_data, upsert=True)
+    await transaction_quarantine_collection.delete_one({"_id": entry["_id"]})
+    await invalidate_user(str(current_user["_id"]))
+    return transaction_helper(transaction_data)
+
+@router.delete("/quarantine/{id}", response_description="Discard a quarantined transaction")
+async def discard_quarantined(id: str, current_user: dict = Depends(get_current_user)):
+    entry = await transaction_quarantine_collection.find_one({"_id": ObjectId(id), "user_id": str(current_user["_id"])})
+    if not entry:
+        raise HTTPException(status_code=404, detail="Quarantined transaction not found")
+
+    await transaction_quarantine_collection.delete_one({"_id": entry["_id"]})
+    return {"message": "Quarantined transaction discarded"}
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Keep the Motor client pointed at a local server; nothing here talks to it
+os.environ.setdefault("MONGO_DETAILS", "mongodb://localhost:27017")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
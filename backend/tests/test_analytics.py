@@ -0,0 +1,80 @@
+from datetime import date, datetime, timedelta
+
+from bson import ObjectId
+
+from analytics import build_frame, compute_insights
+
+def txn(day, amount, category="food", type="expense", payment="UPI"):
+    # Stored shape: amounts in paise, dates as datetimes
+    return {"_id": ObjectId(), "a": round(amount * 100), "d": day, "c": category, "t": type, "p": payment}
+
+def daily_txns(start, days, amount, **kwargs):
+    return [txn(start + timedelta(days=i), amount, **kwargs) for i in range(days)]
+
+def test_empty_frame():
+    result = compute_insights(build_frame([]), today=date(2024, 1, 1))
+    assert result["totals"] == {"income": 0.0, "expense": 0.0, "net": 0.0, "count": 0}
+    assert result["rolling"] is None
+    assert result["anomalies"] == []
+
+def test_single_row():
+    result = compute_insights(build_frame([txn(datetime(2024, 1, 1), 250.5)]), today=date(2024, 1, 1))
+    assert result["totals"]["expense"] == 250.5
+    assert result["byCategory"] == [{"categoryId": "food", "total": 250.5, "count": 1, "percentage": 100.0}]
+    assert result["rolling"] == {"startDate": "2024-01-01", "rolling7": [250.5], "rolling30": [250.5]}
+    assert result["anomalies"] == []
+
+def test_totals_are_exact_in_paise():
+    frame = build_frame([txn(datetime(2024, 1, 1), 0.1), txn(datetime(2024, 1, 2), 0.2), txn(datetime(2024, 1, 3), 0.29)])
+    result = compute_insights(frame, today=date(2024, 1, 3))
+    assert result["totals"]["expense"] == 0.59
+    assert result["monthly"] == [{"month": "2024-01", "income": 0.0, "expense": 0.59}]
+
+def test_partial_windows_average_days_present():
+    frame = build_frame(daily_txns(datetime(2024, 1, 1), 3, 10))
+    rolling = compute_insights(frame, today=date(2024, 1, 3))["rolling"]
+    assert rolling["rolling7"] == [10.0, 10.0, 10.0]
+    assert rolling["rolling30"] == [10.0, 10.0, 10.0]
+
+def test_rolling_aligned_to_start_date():
+    frame = build_frame(daily_txns(datetime(2024, 1, 1), 200, 10))
+    rolling = compute_insights(frame, today=date(2024, 7, 18))["rolling"]
+    # 200 days from 2024-01-01 end on 2024-07-18; only the last 90 are returned
+    assert rolling["startDate"] == "2024-04-20"
+    assert len(rolling["rolling7"]) == 90
+
+def test_rolling_extends_to_today():
+    frame = build_frame(daily_txns(datetime(2024, 1, 1), 7, 10))
+    rolling = compute_insights(frame, today=date(2024, 1, 14))["rolling"]
+    assert len(rolling["rolling7"]) == 14
+    assert rolling["rolling7"][-1] == 0.0
+
+def test_anomaly_flagged():
+    transactions = daily_txns(datetime(2024, 1, 1), 50, 100)
+    spike = txn(datetime(2024, 2, 25), 5000)
+    result = compute_insights(build_frame(transactions + [spike]), today=date(2024, 2, 25))
+    assert [a["id"] for a in result["anomalies"]] == [str(spike["_id"])]
+    assert result["anomalies"][0]["amount"] == 5000.0
+    assert any(i["title"] == "High Spending Alert" for i in result["insights"])
+
+def test_append_matches_full_build():
+    first = [txn(datetime(2024, 1, 1), 10), txn(datetime(2024, 1, 2), 20, category="bills")]
+    second = [txn(datetime(2024, 1, 3), 30, category="rent", type="income", payment="Card")]
+    appended = build_frame(first).append(build_frame(second), version=1)
+    assert appended.version == 1
+    assert compute_insights(appended, today=date(2024, 1, 3)) == compute_insights(build_frame(first + second), today=date(2024, 1, 3))
+
+def test_ids_stored_as_raw_bytes():
+    frame = build_frame([txn(datetime(2024, 1, 1), 10)])
+    assert frame.ids.dtype == "S12"
+
+def test_anomaly_id_with_trailing_zero_bytes():
+    transactions = daily_txns(datetime(2024, 1, 1), 50, 100)
+    spike = txn(datetime(2024, 2, 25), 5000)
+    spike["_id"] = ObjectId("65a1b2c3d4e5f60000000000")
+    result = compute_insights(build_frame(transactions + [spike]), today=date(2024, 2, 25))
+    assert result["anomalies"][0]["id"] == "65a1b2c3d4e5f60000000000"
+
+def test_no_anomalies_without_spread():
+    result = compute_insights(build_frame(daily_txns(datetime(2024, 1, 1), 50, 100)), today=date(2024, 2, 19))
+    assert result["anomalies"] == []
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from migrate_transactions import CONVERSION_ERRORS, legacy_to_storage
+
+def legacy(**overrides):
+    document = {
+        "_id": ObjectId(), "user_id": "u1", "amount": 12.34, "description": "Fuel",
+        "categoryId": "transport", "date": "2023-10-27", "type": "expense", "paymentMode": "Cash"
+    }
+    document.update(overrides)
+    return document
+
+def test_converts_and_keeps_id():
+    document = legacy()
+    assert legacy_to_storage(document) == {
+        "_id": document["_id"], "u": "u1", "a": 1234, "n": "Fuel", "c": "transport",
+        "d": datetime(2023, 10, 27), "t": "expense", "p": "Cash"
+    }
+
+def test_trims_timestamp_dates():
+    assert legacy_to_storage(legacy(date="2023-10-27T18:45:00.000Z"))["d"] == datetime(2023, 10, 27)
+
+def test_missing_payment_mode_gets_default():
+    document = legacy()
+    del document["paymentMode"]
+    assert legacy_to_storage(document)["p"] == "UPI"
+
+@pytest.mark.parametrize("overrides", [
+    {"amount": float("nan")},
+    {"amount": 1e18},
+    {"amount": None},
+    {"amount": 0.001},
+    {"date": "junk"},
+    {"date": None},
+    {"categoryId": None},
+])
+def test_bad_rows_raise_conversion_errors(overrides):
+    with pytest.raises(CONVERSION_ERRORS):
+        legacy_to_storage(legacy(**overrides))
+
+def test_missing_user_raises_conversion_error():
+    document = legacy()
+    del document["user_id"]
+    with pytest.raises(CONVERSION_ERRORS):
+        legacy_to_storage(document)
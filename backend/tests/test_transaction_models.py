@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId, encode
+
+from models.transaction import (
+    MAX_AMOUNT, CreateTransactionSchema, BulkDeleteTransactionSchema,
+    to_minor_units, from_minor_units, parse_date, end_of_day, format_date, to_storage, from_storage
+)
+
+def create(**overrides):
+    values = {"amount": 10.0, "categoryId": "food", "date": "2023-10-27", "type": "expense"}
+    values.update(overrides)
+    return CreateTransactionSchema(**values)
+
+def test_minor_units_round_half_up():
+    assert to_minor_units(19.99) == 1999
+    assert to_minor_units(0.1 + 0.2) == 30
+    assert to_minor_units(100.105) == 10011
+    assert from_minor_units(1999) == 19.99
+
+def test_parse_date_is_midnight():
+    assert parse_date("2023-10-27") == datetime(2023, 10, 27)
+    assert format_date(parse_date("2023-10-27")) == "2023-10-27"
+
+@pytest.mark.parametrize("value", ["2023-10-27T10:00:00", "2023-10-27T23:30+05:30", "27/10/2023", "junk"])
+def test_parse_date_rejects_non_dates(value):
+    with pytest.raises(ValueError):
+        parse_date(value)
+
+def test_end_of_day_handles_date_max():
+    assert end_of_day("9999-12-31") == datetime(9999, 12, 31, 23, 59, 59, 999000)
+
+@pytest.mark.parametrize("amount", [0, -5, 0.001, 0.004, float("nan"), float("inf"), MAX_AMOUNT * 10])
+def test_amount_rejected(amount):
+    with pytest.raises(ValueError):
+        create(amount=amount)
+
+def test_smallest_amount_accepted():
+    assert to_storage(create(amount=0.005), "u1")["a"] == 1
+
+def test_storage_round_trip():
+    transaction = create(amount=1234.5, description="Groceries", paymentMode="Card")
+    stored = to_storage(transaction, "u1")
+    assert stored == {"u": "u1", "a": 123450, "n": "Groceries", "c": "food", "d": datetime(2023, 10, 27), "t": "expense", "p": "Card"}
+    stored["_id"] = ObjectId()
+    assert from_storage(stored) == {
+        "id": str(stored["_id"]), "amount": 1234.5, "description": "Groceries", "categoryId": "food",
+        "date": "2023-10-27", "type": "expense", "paymentMode": "Card", "user_id": "u1"
+    }
+
+def test_null_payment_mode_stored_as_default():
+    assert to_storage(create(paymentMode=None), "u1")["p"] == "UPI"
+
+def test_largest_amount_fits_bson():
+    encode(to_storage(create(amount=MAX_AMOUNT), "u1"))
+
+def test_bulk_delete_dates_validated():
+    BulkDeleteTransactionSchema(endDate="9999-12-31")
+    with pytest.raises(ValueError):
+        BulkDeleteTransactionSchema(startDate="2023-10-27T10:00:00")
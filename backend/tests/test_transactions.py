@@ -0,0 +1,53 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from models.transaction import ArchiveTransactionSchema, BulkDeleteTransactionSchema
+from routers.transactions import ARCHIVE_BATCH_BYTES, archive_cutoff, bulk_filter, cap_batch_bytes
+
+def test_archive_cutoff():
+    assert archive_cutoff(2, today=datetime(2026, 10, 19, 15, 30)) == datetime(2024, 10, 19)
+
+def test_archive_cutoff_leap_day():
+    assert archive_cutoff(1, today=datetime(2024, 2, 29)) == datetime(2023, 2, 28)
+
+def test_older_than_years_is_bounded():
+    with pytest.raises(ValueError):
+        ArchiveTransactionSchema(olderThanYears=3000)
+    with pytest.raises(ValueError):
+        ArchiveTransactionSchema(olderThanYears=0)
+    assert archive_cutoff(ArchiveTransactionSchema(olderThanYears=100).olderThanYears, today=datetime(2026, 1, 1)) == datetime(1926, 1, 1)
+
+def test_cap_batch_bytes_keeps_small_batches():
+    batch = [{"_id": ObjectId(), "n": "x"} for _ in range(10)]
+    assert cap_batch_bytes(batch) == batch
+
+def test_cap_batch_bytes_splits_large_rows():
+    big = "x" * (ARCHIVE_BATCH_BYTES // 3)
+    batch = [{"_id": ObjectId(), "n": big} for _ in range(5)]
+    assert len(cap_batch_bytes(batch)) == 2
+
+def test_cap_batch_bytes_keeps_one_oversized_row():
+    batch = [{"_id": ObjectId(), "n": "x" * (ARCHIVE_BATCH_BYTES + 1)}, {"_id": ObjectId()}]
+    assert len(cap_batch_bytes(batch)) == 1
+
+def test_bulk_filter_user_only_when_empty():
+    assert bulk_filter("u1", BulkDeleteTransactionSchema()) == {"u": "u1"}
+
+def test_bulk_filter_maps_stored_fields():
+    id = ObjectId()
+    query = bulk_filter("u1", BulkDeleteTransactionSchema(ids=[str(id)], categoryId="food", type="expense"))
+    assert query == {"u": "u1", "_id": {"$in": [id]}, "c": "food", "t": "expense"}
+
+def test_bulk_delete_rejects_bad_ids():
+    with pytest.raises(ValueError):
+        BulkDeleteTransactionSchema(ids=["not-an-id"])
+
+def test_bulk_filter_end_date_inclusive_and_safe_at_date_max():
+    query = bulk_filter("u1", BulkDeleteTransactionSchema(startDate="2023-01-01", endDate="9999-12-31"))
+    assert query["d"] == {"$gte": datetime(2023, 1, 1), "$lte": datetime(9999, 12, 31, 23, 59, 59, 999000)}
+
+def test_bulk_filter_default_payment_mode_matches_missing():
+    assert bulk_filter("u1", BulkDeleteTransactionSchema(paymentMode="UPI"))["p"] == {"$in": ["UPI", None]}
+    assert bulk_filter("u1", BulkDeleteTransactionSchema(paymentMode="Card"))["p"] == "Card"